@@ -0,0 +1,313 @@
+""" Concurrent, cached metadata enrichment for bibliography entries. """
+
+import asyncio
+import hashlib
+import json
+import pathlib
+import re
+from difflib import SequenceMatcher
+from urllib.parse import quote
+
+API = "https://api.crossref.org"
+FIELDS = ("doi", "abstract", "year")
+
+
+def _is_missing(value):
+    """ Determine whether a field value is absent (empty or NaN). """
+
+    return value is None or value != value or str(value).strip() == ""
+
+
+def _clean_title(title):
+    """ Strip BibTeX braces and excess whitespace from a title. """
+
+    return " ".join(re.sub(r"[{}]", "", title).split())
+
+
+def _clean_abstract(abstract):
+    """ Strip the JATS markup and excess whitespace from an abstract. """
+
+    abstract = re.sub(r"<jats:title>.*?</jats:title>", "", abstract)
+    return " ".join(re.sub(r"<[^>]+>", " ", abstract).split())
+
+
+class ResponseCache:
+    """ An on-disk store of JSON responses keyed on their request.
+
+    Missing records are cached as well, so a rerun makes no new requests for
+    anything that has already been looked up.
+    """
+
+    def __init__(self, root):
+
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url, params):
+        """ Get the file name of the response to a request. """
+
+        request = json.dumps([url, sorted((params or {}).items())])
+        digest = hashlib.sha256(request.encode()).hexdigest()
+        return self.root / f"{digest}.json"
+
+    def __contains__(self, request):
+
+        return self._path(*request).exists()
+
+    def get(self, url, params=None):
+        """ Read a cached response. """
+
+        return json.loads(self._path(url, params).read_text())["response"]
+
+    def set(self, url, params, response):
+        """ Write a response to the cache, atomically. """
+
+        path = self._path(url, params)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"url": url, "response": response}))
+        temporary.replace(path)
+
+
+class RetryableError(Exception):
+    """ A response worth trying again later, such as a 429 or 503. The wait
+    the server asked for, if any, is kept in `retry_after`. """
+
+    def __init__(self, status, retry_after=None):
+
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value):
+    """ Read the number of seconds in a `Retry-After` header, if there is
+    one. """
+
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AiohttpTransport:
+    """ The default HTTP layer: a single `aiohttp` session sharing a pool of
+    at most `pool_size` connections.
+
+    Any asynchronous context manager with a `get_json(url, params)` coroutine,
+    returning the decoded body or `None` for a missing record and raising
+    `RetryableError` for a response worth retrying, can be used in its place;
+    a stub pointed at a local server, for instance.
+    """
+
+    def __init__(self, pool_size=16, timeout=30, mailto=None):
+
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.mailto = mailto
+        self.session = None
+
+    async def __aenter__(self):
+
+        import aiohttp
+
+        agent = "literature-review"
+        if self.mailto is not None:
+            agent += f" (mailto:{self.mailto})"
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": agent},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+
+        await self.session.close()
+
+    async def get_json(self, url, params=None):
+        """ Make a GET request and decode the JSON response. """
+
+        async with self.session.get(url, params=params) as response:
+            if response.status == 404:
+                return None
+            if response.status in (429, 503):
+                retry_after = response.headers.get("Retry-After")
+                raise RetryableError(
+                    response.status, _parse_retry_after(retry_after)
+                )
+
+            response.raise_for_status()
+            return await response.json()
+
+
+class Enricher:
+    """ Look up the missing metadata of many entries concurrently.
+
+    Entries with a DOI are fetched directly; the rest are matched on their
+    title. At most `concurrency` requests are in flight at any one time, and
+    identical requests share a single call. Retryable responses and timeouts
+    are tried up to `retries` more times, backing off exponentially from
+    `backoff` seconds unless the server says how long to wait. An entry whose
+    lookup still fails is reported and left as it is; failures are not
+    cached, so the next run tries again.
+    """
+
+    def __init__(
+        self,
+        transport,
+        cache,
+        base_url=API,
+        concurrency=8,
+        retries=4,
+        backoff=1.0,
+    ):
+
+        self.transport = transport
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.pending = {}
+        self.requests = 0
+        self.failures = 0
+
+    async def _fetch(self, url, params):
+        """ Make a request, retrying it while the response is retryable. """
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    self.requests += 1
+                    return await self.transport.get_json(url, params)
+            except (RetryableError, asyncio.TimeoutError) as error:
+                if attempt == self.retries:
+                    raise
+
+                delay = getattr(error, "retry_after", None)
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt
+                await asyncio.sleep(delay)
+
+    async def _get(self, url, params=None):
+        """ Get a response from the cache or, failing that, the transport,
+        sharing the call with any identical request already in flight. """
+
+        if (url, params) in self.cache:
+            return self.cache.get(url, params)
+
+        key = json.dumps([url, sorted((params or {}).items())])
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(self._fetch(url, params))
+
+        try:
+            response = await asyncio.shield(self.pending[key])
+        finally:
+            self.pending.pop(key, None)
+
+        if (url, params) not in self.cache:
+            self.cache.set(url, params, response)
+
+        return response
+
+    async def _find_record(self, entry):
+        """ Find the Crossref record of an entry, if there is one. """
+
+        if not _is_missing(entry.get("doi")):
+            url = f"{self.base_url}/works/{quote(entry['doi'], safe='/')}"
+            response = await self._get(url)
+            return (response or {}).get("message")
+
+        if _is_missing(entry.get("title")):
+            return None
+
+        title = _clean_title(entry["title"])
+        params = {"query.bibliographic": title, "rows": "1"}
+        response = await self._get(f"{self.base_url}/works", params)
+        items = (response or {}).get("message", {}).get("items", [])
+        if not items:
+            return None
+
+        record = items[0]
+        candidate = _clean_title(" ".join(record.get("title", [])))
+        similarity = SequenceMatcher(None, title.lower(), candidate.lower())
+        if similarity.ratio() < 0.9:
+            return None
+
+        return record
+
+    async def enrich_entry(self, entry):
+        """ Get the missing fields of an entry. """
+
+        missing = [field for field in FIELDS if _is_missing(entry.get(field))]
+        if not missing:
+            return {}
+
+        record = await self._find_record(entry)
+        if record is None:
+            return {}
+
+        found = {}
+        if record.get("DOI"):
+            found["doi"] = record["DOI"]
+        if record.get("abstract"):
+            found["abstract"] = _clean_abstract(record["abstract"])
+        date = record.get("issued", {}).get("date-parts", [[None]])[0]
+        if date and date[0] is not None:
+            found["year"] = str(date[0])
+
+        return {field: found[field] for field in missing if field in found}
+
+    async def _enrich_entry_safely(self, entry):
+        """ Get the missing fields of an entry, reporting (rather than
+        raising) any failure to look it up. """
+
+        try:
+            return await self.enrich_entry(entry)
+        except Exception as error:
+            self.failures += 1
+            key = entry.get("ID", entry.get("title"))
+            print(f"❗️ Could not enrich {key}: {error!r}")
+            return {}
+
+    async def enrich(self, entries):
+        """ Get the missing fields of every entry, in order. """
+
+        return await asyncio.gather(
+            *(self._enrich_entry_safely(entry) for entry in entries)
+        )
+
+
+async def _enrich(entries, cache, base_url, concurrency, transport):
+    """ Run an enricher inside the lifetime of its transport. """
+
+    if transport is None:
+        transport = AiohttpTransport(pool_size=concurrency)
+
+    async with transport:
+        enricher = Enricher(transport, cache, base_url, concurrency)
+        updates = await enricher.enrich(entries)
+
+    print(f"Made {enricher.requests} new request(s).")
+    if enricher.failures:
+        print(f"❗️ {enricher.failures} entries could not be enriched.")
+    return updates
+
+
+def enrich_entries(
+    entries,
+    cache=".cache/crossref",
+    base_url=API,
+    concurrency=8,
+    transport=None,
+):
+    """ Fill in the missing DOIs, abstracts and years of some entries.
+
+    Returns a list with a dictionary of new fields for each entry.
+    """
+
+    cache = ResponseCache(cache)
+    return asyncio.run(
+        _enrich(list(entries), cache, base_url, concurrency, transport)
+    )
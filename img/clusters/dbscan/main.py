@@ -4,9 +4,13 @@ import pathlib
 
 import matplotlib.pyplot as plt
 import numpy as np
-from sklearn import cluster, preprocessing
+
+import fitting
+import projection
+import rendering
 
 eps = 0.29
+min_samples = 5
 seed = 0
 lims = (-2.6, 2.6)
 cmap = plt.cm.viridis
@@ -25,20 +29,30 @@ def _get_cluster_colours(n_clusters):
     )
 
 
-def make_plot(dataset, true_labels, name):
+def make_plot(
+    dataset,
+    true_labels,
+    name,
+    eps=eps,
+    min_samples=min_samples,
+    space="full",
+    method="pca",
+    renderer=None,
+):
     """Make the scatter plots for the inliers and outliers for a particular
     dataset."""
 
-    _, ax = plt.subplots(dpi=300)
+    scaled, points, _ = projection.prepare(dataset, space, method)
+    plot_lims = projection.get_lims(dataset, points, lims)
 
-    n_clusters = len(set(true_labels))
-    scaled = preprocessing.StandardScaler().fit_transform(dataset.copy())
-    dbscan = cluster.DBSCAN(eps=eps).fit(scaled)
+    renderer = renderer or rendering.Renderer()
+    ax = renderer.axes("scatter", xlim=plot_lims, ylim=plot_lims)
 
-    labels = dbscan.labels_
+    n_clusters = len(set(true_labels))
+    labels = fitting.dbscan(scaled, eps, min_samples)["labels"]
     outlier_mask = labels == -1
-    inliers = scaled[~outlier_mask, :]
-    outliers = scaled[outlier_mask, :]
+    inliers = points[~outlier_mask, :]
+    outliers = points[outlier_mask, :]
 
     inlier_true_labels = true_labels[~outlier_mask]
     inlier_labels = labels[~outlier_mask]
@@ -67,29 +81,27 @@ def make_plot(dataset, true_labels, name):
     )
 
     here = pathlib.Path(__file__).parent
-    ax.set(aspect="equal", xticks=[], yticks=[], xlim=lims, ylim=lims)
-
-    plt.tight_layout()
-    plt.savefig(
-        here / f"{name}.pdf",
-        transparent=True,
-        bbox_inches="tight",
-        pad_inches=0.25,
-    )
+    renderer.save(ax, here / name)
+
 
+def main(names=("moons", "ellipses", "spheres"), settings=None, renderer=None):
+    """Create a plot for each dataset and write it to file. Any `settings`
+    for a dataset are passed on to `make_plot`."""
 
-def main():
-    """Create a plot for each dataset and write it to file."""
+    settings = settings or {}
+    renderer = renderer or rendering.Renderer()
 
     here = pathlib.Path(__file__).parent
     data = here / "../data/"
-    for name in ("moons", "ellipses", "spheres"):
-        dataset = np.genfromtxt(data / name / "main.csv", delimiter=",")
+    for name in names:
+        dataset = projection.load_dataset(data / name)
         labels = np.genfromtxt(
             data / name / "labels.csv", delimiter=","
         ).astype(int)
 
-        make_plot(dataset, labels, name)
+        make_plot(
+            dataset, labels, name, renderer=renderer, **settings.get(name, {})
+        )
 
 
 if __name__ == "__main__":
@@ -5,7 +5,10 @@ import pathlib
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy.cluster import hierarchy
-from sklearn import cluster, preprocessing
+
+import fitting
+import projection
+import rendering
 
 linkage = "average"
 default_colour = "#808080"
@@ -29,13 +32,7 @@ def _get_leaf_colours(data, criterion, n_clusters):
     `n_clusters` parts with the colour map `cmap`."""
 
     cluster_colours = _get_cluster_colours(n_clusters)
-    labels = (
-        cluster.AgglomerativeClustering(
-            n_clusters=n_clusters, linkage=criterion
-        )
-        .fit(data)
-        .labels_
-    )
+    labels = fitting.agglomerative(data, n_clusters, criterion)["labels"]
 
     return {i: cluster_colours[label] for i, label in enumerate(labels)}
 
@@ -58,16 +55,27 @@ def _get_link_colours(linkage_matrix, leaf_colours):
     return link_colours
 
 
-def make_plot(dataset, true_labels, name, **kwargs):
+def make_plot(
+    dataset,
+    true_labels,
+    name,
+    n_clusters=None,
+    linkage=linkage,
+    space="full",
+    method="pca",
+    renderer=None,
+    **kwargs,
+):
     """Create the linkage matrix for a dataset and then plot the dendrogram."""
 
-    _, ax = plt.subplots(dpi=300)
+    renderer = renderer or rendering.Renderer()
+    ax = renderer.axes("dendogram")
 
-    n_clusters = len(set(true_labels))
-    scaled = preprocessing.StandardScaler().fit_transform(dataset.copy())
+    n_clusters = n_clusters or len(set(true_labels))
+    scaled, _, _ = projection.prepare(dataset, space, method)
     leaf_colours = _get_leaf_colours(scaled, linkage, n_clusters)
 
-    linkage_matrix = hierarchy.linkage(scaled, linkage)
+    linkage_matrix = fitting.linkage_matrix(scaled, linkage)["linkage_matrix"]
     link_colours = _get_link_colours(linkage_matrix, leaf_colours)
 
     hierarchy.dendrogram(
@@ -77,37 +85,30 @@ def make_plot(dataset, true_labels, name, **kwargs):
         **kwargs,
     )
 
-    ax.set(
-        xticks=[],
-        yticks=[],
-    )
-
-    ax.axis("off")
+    ax.set(xticks=[], yticks=[])
 
     here = pathlib.Path(__file__).parent
-    ax.set(xticks=[], yticks=[])
+    renderer.save(ax, here / name)
 
-    plt.tight_layout()
-    plt.savefig(
-        here / f"{name}.pdf",
-        transparent=True,
-        bbox_inches="tight",
-        pad_inches=0.25,
-    )
 
+def main(names=("moons", "ellipses", "spheres"), settings=None, renderer=None):
+    """Create a plot for each dataset and write it to file. Any `settings`
+    for a dataset are passed on to `make_plot`."""
 
-def main():
-    """Create a plot for each dataset and write it to file."""
+    settings = settings or {}
+    renderer = renderer or rendering.Renderer()
 
     here = pathlib.Path(__file__).parent
     data = here / "../data/"
-    for name in ("moons", "ellipses", "spheres"):
-        dataset = np.genfromtxt(data / name / "main.csv", delimiter=",")
+    for name in names:
+        dataset = projection.load_dataset(data / name)
         labels = np.genfromtxt(
             data / name / "labels.csv", delimiter=","
         ).astype(int)
 
-        make_plot(dataset, labels, name)
+        make_plot(
+            dataset, labels, name, renderer=renderer, **settings.get(name, {})
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+"""Source code to fit the clustering models behind the figures.
+
+Fitted results are kept in a content-addressed cache on disk, keyed on the
+data, the algorithm, its parameters and the library versions, so that
+changing how a figure is drawn does not mean fitting its model again.
+"""
+
+import hashlib
+import json
+import pathlib
+
+import numpy as np
+import scipy
+import sklearn
+from scipy import spatial
+from scipy.cluster import hierarchy
+from sklearn import cluster
+
+cache = pathlib.Path(__file__).parent / ".cache"
+
+
+def _get_key(data, algorithm, params, chunk_size=10_000):
+    """Hash the data, algorithm, parameters and library versions of a fit.
+    The data are hashed a chunk of rows at a time, so that a memory-mapped
+    array is never copied whole."""
+
+    params = {
+        name: value.item() if isinstance(value, np.generic) else value
+        for name, value in params.items()
+    }
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps([data.shape, data.dtype.str]).encode())
+    for start in range(0, len(data), chunk_size):
+        chunk = np.ascontiguousarray(data[start : start + chunk_size])
+        digest.update(chunk.tobytes())
+
+    digest.update(
+        json.dumps(
+            [algorithm, params, sklearn.__version__, scipy.__version__],
+            sort_keys=True,
+        ).encode()
+    )
+
+    return digest.hexdigest()
+
+
+def _fit(algorithm, fit, data, **params):
+    """Get the result of a fit from the cache, only fitting the model (and
+    storing its result) if it is not there already."""
+
+    path = cache / f"{algorithm}-{_get_key(data, algorithm, params)}.npz"
+    if path.exists():
+        with np.load(path) as stored:
+            return dict(stored)
+
+    result = fit(data, **params)
+
+    cache.mkdir(exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as store:
+        np.savez(store, **result)
+    temporary.replace(path)
+
+    return result
+
+
+def _get_voronoi_cells(centres):
+    """Given a set of cluster centres, find the vertices and edges of their
+    associated Voronoi cells.
+
+    Adapted from https://nbviewer.jupyter.org/gist/pv/8037100
+    """
+
+    vor = spatial.Voronoi(centres)
+
+    new_regions = []
+    new_vertices = vor.vertices.tolist()
+
+    center = vor.points.mean(axis=0)
+    radius = vor.points.ptp().max() * 10
+
+    all_ridges = {}
+    for (p1, p2), (v1, v2) in zip(vor.ridge_points, vor.ridge_vertices):
+        all_ridges.setdefault(p1, []).append((p2, v1, v2))
+        all_ridges.setdefault(p2, []).append((p1, v1, v2))
+
+    # Reconstruct infinite regions
+    for p1, region in enumerate(vor.point_region):
+        vertices = vor.regions[region]
+
+        if all([v >= 0 for v in vertices]):
+            # finite region
+            new_regions.append(vertices)
+            continue
+
+        # reconstruct a non-finite region
+        ridges = all_ridges[p1]
+        new_region = [v for v in vertices if v >= 0]
+
+        for p2, v1, v2 in ridges:
+            if v2 < 0:
+                v1, v2 = v2, v1
+            if v1 >= 0:
+                # finite ridge: already in the region
+                continue
+
+            # Compute the missing endpoint of an infinite ridge
+            t = vor.points[p2] - vor.points[p1]  # tangent
+            t /= np.linalg.norm(t)
+            n = np.array([-t[1], t[0]])  # normal
+
+            midpoint = vor.points[[p1, p2]].mean(axis=0)
+            direction = np.sign(np.dot(midpoint - center, n)) * n
+            far_point = vor.vertices[v2] + direction * radius
+
+            new_region.append(len(new_vertices))
+            new_vertices.append(far_point.tolist())
+
+        # sort region counterclockwise
+        vs = np.asarray([new_vertices[v] for v in new_region])
+        c = vs.mean(axis=0)
+        angles = np.arctan2(vs[:, 1] - c[1], vs[:, 0] - c[0])
+        new_region = np.array(new_region)[np.argsort(angles)]
+
+        new_regions.append(new_region.tolist())
+
+    return new_regions, np.asarray(new_vertices)
+
+
+def _fit_kmeans(data, n_clusters, seed):
+    """Fit k-means and find the Voronoi cells of its centres. The cells are
+    flattened into arrays so that they can be stored."""
+
+    kmeans = cluster.KMeans(n_clusters, random_state=seed).fit(data)
+    result = {"labels": kmeans.labels_, "centres": kmeans.cluster_centers_}
+
+    if n_clusters > 2 and data.shape[1] == 2:
+        regions, vertices = _get_voronoi_cells(kmeans.cluster_centers_)
+        result["vertices"] = vertices
+        result["region_indices"] = np.concatenate(regions).astype(int)
+        result["region_sizes"] = np.array([len(r) for r in regions])
+
+    return result
+
+
+def _fit_dbscan(data, eps, min_samples):
+    """Fit DBSCAN."""
+
+    model = cluster.DBSCAN(eps=eps, min_samples=min_samples).fit(data)
+
+    return {"labels": model.labels_}
+
+
+def _fit_agglomerative(data, n_clusters, linkage):
+    """Fit an agglomerative clustering."""
+
+    model = cluster.AgglomerativeClustering(
+        n_clusters=n_clusters, linkage=linkage
+    ).fit(data)
+
+    return {"labels": model.labels_}
+
+
+def _fit_linkage_matrix(data, linkage):
+    """Build the linkage matrix of a hierarchical clustering."""
+
+    return {"linkage_matrix": hierarchy.linkage(data, linkage)}
+
+
+def kmeans(data, n_clusters, seed):
+    """Get the labels, centres and Voronoi cells of a k-means clustering."""
+
+    return _fit("kmeans", _fit_kmeans, data, n_clusters=n_clusters, seed=seed)
+
+
+def dbscan(data, eps, min_samples):
+    """Get the labels of a DBSCAN clustering."""
+
+    return _fit("dbscan", _fit_dbscan, data, eps=eps, min_samples=min_samples)
+
+
+def agglomerative(data, n_clusters, linkage):
+    """Get the labels of an agglomerative clustering."""
+
+    return _fit(
+        "agglomerative",
+        _fit_agglomerative,
+        data,
+        n_clusters=n_clusters,
+        linkage=linkage,
+    )
+
+
+def linkage_matrix(data, linkage):
+    """Get the linkage matrix of a hierarchical clustering."""
+
+    return _fit("linkage", _fit_linkage_matrix, data, linkage=linkage)
+
+
+def get_voronoi_cells(result, centres):
+    """Recover the Voronoi regions and vertices from a k-means result. When
+    the model was fitted in more than two dimensions, the cells are instead
+    found for `centres`, its centres projected onto the plane."""
+
+    if "region_sizes" not in result:
+        return _get_voronoi_cells(centres)
+
+    sizes = result["region_sizes"]
+    regions = np.split(result["region_indices"], np.cumsum(sizes)[:-1])
+
+    return [region.tolist() for region in regions], result["vertices"]
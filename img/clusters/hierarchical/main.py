@@ -4,7 +4,10 @@ import pathlib
 
 import matplotlib.pyplot as plt
 import numpy as np
-from sklearn import cluster, preprocessing
+
+import fitting
+import projection
+import rendering
 
 seed = 0
 lims = (-2.6, 2.6)
@@ -25,18 +28,26 @@ def _get_cluster_colours(n_clusters):
     )
 
 
-def make_plot(dataset, true_labels, name):
+def make_plot(
+    dataset,
+    true_labels,
+    name,
+    n_clusters=None,
+    linkage=linkage,
+    space="full",
+    method="pca",
+    renderer=None,
+):
     """Make the scatter plot."""
 
-    _, ax = plt.subplots(dpi=300)
+    scaled, points, _ = projection.prepare(dataset, space, method)
+    plot_lims = projection.get_lims(dataset, points, lims)
 
-    n_clusters = len(set(true_labels))
-    scaled = preprocessing.StandardScaler().fit_transform(dataset.copy())
-    hierarchical = cluster.AgglomerativeClustering(
-        n_clusters=n_clusters, linkage=linkage
-    ).fit(scaled)
+    renderer = renderer or rendering.Renderer()
+    ax = renderer.axes("scatter", xlim=plot_lims, ylim=plot_lims)
 
-    labels = hierarchical.labels_
+    n_clusters = n_clusters or len(set(true_labels))
+    labels = fitting.agglomerative(scaled, n_clusters, linkage)["labels"]
     colours = _get_cluster_colours(n_clusters)
 
     for label in set(true_labels):
@@ -44,7 +55,7 @@ def make_plot(dataset, true_labels, name):
         mask = true_labels == label
         cluster_labels = labels[mask]
         cluster_colours = [colours[lab] for lab in cluster_labels]
-        xs, ys = scaled[mask, 0], scaled[mask, 1]
+        xs, ys = points[mask, 0], points[mask, 1]
 
         ax.scatter(
             xs,
@@ -57,29 +68,27 @@ def make_plot(dataset, true_labels, name):
         )
 
     here = pathlib.Path(__file__).parent
-    ax.set(aspect="equal", xticks=[], yticks=[], xlim=lims, ylim=lims)
-
-    plt.tight_layout()
-    plt.savefig(
-        here / f"{name}.pdf",
-        transparent=True,
-        bbox_inches="tight",
-        pad_inches=0.25,
-    )
+    renderer.save(ax, here / name)
 
 
-def main():
-    """Create a plot for each dataset and write it to file."""
+def main(names=("moons", "ellipses", "spheres"), settings=None, renderer=None):
+    """Create a plot for each dataset and write it to file. Any `settings`
+    for a dataset are passed on to `make_plot`."""
+
+    settings = settings or {}
+    renderer = renderer or rendering.Renderer()
 
     here = pathlib.Path(__file__).parent
     data = here / "../data/"
-    for name in ("moons", "ellipses", "spheres"):
-        dataset = np.genfromtxt(data / name / "main.csv", delimiter=",")
+    for name in names:
+        dataset = projection.load_dataset(data / name)
         labels = np.genfromtxt(
             data / name / "labels.csv", delimiter=","
         ).astype(int)
 
-        make_plot(dataset, labels, name)
+        make_plot(
+            dataset, labels, name, renderer=renderer, **settings.get(name, {})
+        )
 
 
 if __name__ == "__main__":
@@ -1,20 +1,27 @@
 """Main script for creating all the plots. Requires the datasets."""
 
+import sys
+
 import data
+import rendering
 from kmeans import main as kmeans
 from hierarchical import main as hierarchical
 from dendogram import main as dendogram
 from dbscan import main as dbscan
 
 
-def main():
-    """Create all the plots and write them to file."""
+def main(formats=("pdf",), pages=None):
+    """Create all the plots and write them to file in each of `formats`, and
+    to the multi-page PDF `pages` if given."""
 
-    kmeans.main()
-    hierarchical.main()
-    dendogram.main()
-    dbscan.main()
+    with rendering.Renderer(formats, pages) as renderer:
+        kmeans.main(renderer=renderer)
+        hierarchical.main(renderer=renderer)
+        dendogram.main(renderer=renderer)
+        dbscan.main(renderer=renderer)
 
 
 if __name__ == "__main__":
-    main()
+    formats = sys.argv[1].split(",") if len(sys.argv) > 1 else ("pdf",)
+    pages = sys.argv[2] if len(sys.argv) > 2 else None
+    main(formats, pages)
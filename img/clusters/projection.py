@@ -0,0 +1,208 @@
+"""Source code to scale and project datasets of any dimension.
+
+The figures draw points in the plane, but the data behind them need not be
+two-dimensional. Datasets are scaled and projected in chunks, so that one
+stored as a `.npy` file can be memory-mapped rather than loaded whole. The
+models are then fitted in either the full, scaled space or a reduced one,
+while the plots use a two-dimensional projection of that space. Like the
+fitted models, each prepared dataset is kept in the cache.
+"""
+
+import functools
+import os
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn import decomposition, preprocessing, random_projection
+
+import fitting
+
+chunk_size = 10_000
+n_components = 50
+seed = 0
+padding = 0.1
+
+
+def load_dataset(directory):
+    """Load a dataset, memory-mapping it if it is stored as `main.npy`."""
+
+    directory = pathlib.Path(directory)
+    if (directory / "main.npy").exists():
+        return np.load(directory / "main.npy", mmap_mode="r")
+
+    return np.genfromtxt(directory / "main.csv", delimiter=",")
+
+
+def _get_chunks(n_samples, minimum=1):
+    """Split the rows of a dataset into chunks of `chunk_size` rows, merging
+    the last chunk into the one before if it has fewer than `minimum`."""
+
+    starts = list(range(0, n_samples, chunk_size))
+    stops = starts[1:] + [n_samples]
+    if len(starts) > 1 and stops[-1] - starts[-1] < minimum:
+        starts.pop()
+        stops.pop(-2)
+
+    return list(zip(starts, stops))
+
+
+def _get_scaled_chunks(data, scaler=None, minimum=1):
+    """Iterate over the chunks of some data, scaling each one on its own if
+    there is a fitted `scaler`."""
+
+    for start, stop in _get_chunks(len(data), minimum):
+        chunk = data[start:stop]
+        if scaler is not None:
+            chunk = scaler.transform(chunk)
+
+        yield start, stop, chunk
+
+
+def fit_scaler(data):
+    """Find the mean and variance of each column of some data, over chunks."""
+
+    scaler = preprocessing.StandardScaler()
+    for start, stop in _get_chunks(len(data)):
+        scaler.partial_fit(data[start:stop])
+
+    return scaler
+
+
+def scale(data, scaler, out=None):
+    """Standardise each column of some data, a chunk at a time.
+
+    The result is written to `out`, a path for a new memory-mapped array, if
+    given. Otherwise, a memory-mapped input is scaled into a temporary
+    memory-mapped array, so that it is never held in memory whole.
+    """
+
+    if out is None and isinstance(data, np.memmap):
+        descriptor, out = tempfile.mkstemp(suffix=".npy")
+        os.close(descriptor)
+        scaled = np.lib.format.open_memmap(out, "w+", float, data.shape)
+        os.remove(out)
+    elif out is not None:
+        scaled = np.lib.format.open_memmap(out, "w+", float, data.shape)
+    else:
+        scaled = np.empty(data.shape)
+
+    for start, stop, chunk in _get_scaled_chunks(data, scaler):
+        scaled[start:stop] = chunk
+
+    if isinstance(scaled, np.memmap):
+        scaled.flush()
+
+    return scaled
+
+
+def fit_projection(data, n_components, method="pca", scaler=None):
+    """Fit a projection of some data onto `n_components` dimensions, scaling
+    each chunk first if there is a fitted `scaler`.
+
+    With `method="pca"` this is an incremental PCA, fitted a chunk at a time.
+    With `method="random"` it is a sparse random projection, which depends
+    only on the number of columns and so suits very wide data.
+    """
+
+    if method == "random":
+        projection = random_projection.SparseRandomProjection(
+            n_components, random_state=seed
+        )
+        return projection.fit(data[:chunk_size])
+
+    projection = decomposition.IncrementalPCA(n_components)
+    for _, _, chunk in _get_scaled_chunks(data, scaler, n_components):
+        projection.partial_fit(chunk)
+
+    return projection
+
+
+def transform(data, projection, scaler=None):
+    """Project some data, a chunk at a time, scaling each chunk first if
+    there is a fitted `scaler`."""
+
+    projected = np.empty((len(data), projection.n_components))
+    for start, stop, chunk in _get_scaled_chunks(data, scaler):
+        projected[start:stop] = projection.transform(chunk)
+
+    return projected
+
+
+def _project(points, mean, components):
+    """Project some points onto the plane found by a PCA."""
+
+    return (np.asarray(points) - mean) @ components.T
+
+
+def _prepare(dataset, space, method, directory):
+    """Scale and project a dataset, writing the data to fit to, their
+    projection onto the plane and the plane itself to `directory`."""
+
+    scaler = fit_scaler(dataset)
+    if space == "reduced" and dataset.shape[1] > n_components:
+        reduction = fit_projection(dataset, n_components, method, scaler)
+        data = transform(dataset, reduction, scaler)
+        np.save(directory / "data.npy", data)
+    else:
+        data = scale(dataset, scaler, directory / "data.npy")
+
+    if data.shape[1] <= 2:
+        mean, components = np.zeros(data.shape[1]), np.eye(data.shape[1])
+        points = data
+    else:
+        plane = fit_projection(data, 2)
+        mean, components = plane.mean_, plane.components_
+        points = transform(data, plane)
+
+    np.save(directory / "points.npy", points)
+    np.savez(directory / "plane.npz", mean=mean, components=components)
+
+
+def prepare(dataset, space="full", method="pca"):
+    """Scale a dataset and get the data to fit the models to, in the `full` or
+    `reduced` space, along with its projection onto the plane and a function
+    that projects any other points in that space (such as cluster centres).
+
+    The results are kept in the cache of fitted models, keyed on the data and
+    the settings of the projection, and memory-mapped from there, so neither
+    the data to fit to nor their projection are held in memory whole and each
+    dataset is only prepared once.
+    """
+
+    params = {
+        "space": space,
+        "method": method,
+        "n_components": n_components,
+        "seed": seed,
+        "chunk_size": chunk_size,
+    }
+    key = fitting._get_key(dataset, "projection", params)
+    path = fitting.cache / f"projection-{key}"
+    if not path.exists():
+        temporary = path.with_suffix(".tmp")
+        shutil.rmtree(temporary, ignore_errors=True)
+        temporary.mkdir(parents=True)
+        _prepare(dataset, space, method, temporary)
+        temporary.replace(path)
+
+    data = np.load(path / "data.npy", mmap_mode="r")
+    points = np.load(path / "points.npy", mmap_mode="r")
+    with np.load(path / "plane.npz") as plane:
+        to_plane = functools.partial(_project, **plane)
+
+    return data, points, to_plane
+
+
+def get_lims(dataset, points, lims):
+    """Get the limits of the axes to plot the points of a dataset in the plane.
+    A two-dimensional dataset is plotted as it is, within the fixed `lims` of
+    its figure. Otherwise, the projected points can lie much further out, so
+    the limits are symmetric about the origin and padded around them."""
+
+    if dataset.shape[1] <= 2:
+        return lims
+
+    bound = np.abs(points).max() * (1 + padding)
+    return -bound, bound
@@ -0,0 +1,106 @@
+"""Source code to draw and export the figures.
+
+A `Renderer` owns every figure it draws. Rather than going through `pyplot`,
+which keeps each figure alive until it is closed, it keeps one figure per axes
+template and clears it for the next plot, so memory stays flat however many
+plots are made. Each plot is laid out once and then written in every format,
+and optionally to a single multi-page PDF.
+"""
+
+import pathlib
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+dpi = 300
+pad_inches = 0.25
+templates = {
+    "scatter": {"axis": True, "aspect": "equal", "xticks": [], "yticks": []},
+    "dendogram": {"axis": False, "xticks": [], "yticks": []},
+}
+
+
+class Renderer:
+    """Draw plots on reused figures and export them to one or more formats.
+
+    Use as a context manager, so that the multi-page PDF (if any) is finished
+    and the figures are released at the end.
+    """
+
+    def __init__(self, formats=("pdf",), pages=None):
+
+        self.formats = tuple(formats)
+        self.pages = None if pages is None else PdfPages(pages)
+        self.figures = {}
+        self.canvases = {}
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+    def close(self):
+        """Finish the multi-page PDF and release the figures."""
+
+        if self.pages is not None:
+            self.pages.close()
+            self.pages = None
+
+        for figure in self.figures.values():
+            figure.clear()
+        self.figures.clear()
+        self.canvases.clear()
+
+    def axes(self, template, **settings):
+        """Clear the figure for a template and get its axes, set up with the
+        template and any other `settings`, to draw on."""
+
+        figure = self.figures.get(template)
+        if figure is None:
+            figure = Figure(dpi=dpi)
+            figure.subplots()
+            self.figures[template] = figure
+            self.canvases[template] = FigureCanvasAgg(figure)
+
+        # Some versions of matplotlib leave the canvas of the multi-page PDF
+        # attached to the figure after saving to it, so put ours back.
+        figure.set_canvas(self.canvases[template])
+
+        ax = figure.axes[0]
+        ax.clear()
+
+        settings = {**templates[template], **settings}
+        if settings.pop("axis"):
+            ax.set_axis_on()
+        else:
+            ax.set_axis_off()
+
+        ax.set(**settings)
+
+        return ax
+
+    def save(self, ax, path):
+        """Lay out the figure of some axes once, then write it to `path` with
+        the suffix of each format and add it to the multi-page PDF."""
+
+        figure = ax.figure
+        canvas = figure.canvas
+        figure.tight_layout()
+        renderer = canvas.get_renderer()
+        bbox = figure.get_tightbbox(renderer).padded(pad_inches)
+
+        path = pathlib.Path(path)
+        for extension in self.formats:
+            figure.savefig(
+                path.with_suffix(f".{extension}"),
+                transparent=True,
+                bbox_inches=bbox,
+            )
+
+        if self.pages is not None:
+            self.pages.savefig(figure, transparent=True, bbox_inches=bbox)
+            figure.set_canvas(canvas)
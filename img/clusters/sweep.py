@@ -0,0 +1,226 @@
+"""Source code to sweep over the parameters of each clustering algorithm.
+
+Every configuration in the grids is fitted in a pool of processes and scored
+against the true labels of its dataset. The results are written to a single
+table, and the best configuration for each dataset is used to make the plots.
+"""
+
+import itertools
+import pathlib
+from concurrent import futures
+
+import numpy as np
+import pandas as pd
+from scipy.cluster import hierarchy
+from sklearn import cluster, metrics, neighbors
+
+import fitting
+import projection
+from dbscan import main as dbscan
+from dendogram import main as dendogram
+from hierarchical import main as hierarchical
+from kmeans import main as kmeans
+
+n_clusters = range(2, 7)
+seeds = range(5)
+eps = np.round(np.linspace(0.1, 0.5, 9), 2)
+linkages = ("single", "complete", "average", "ward")
+
+min_samples = 5
+min_core = 0.25
+max_noise = 0.5
+min_size = 0.02
+partial_iter = 5
+
+params = {
+    "kmeans": ("n_clusters", "seed"),
+    "dbscan": ("eps", "min_samples"),
+    "agglomerative": ("n_clusters", "linkage"),
+}
+types = {
+    "n_clusters": int,
+    "seed": int,
+    "eps": float,
+    "min_samples": int,
+    "linkage": str,
+}
+figures = {
+    "kmeans": (kmeans,),
+    "dbscan": (dbscan,),
+    "agglomerative": (hierarchical, dendogram),
+}
+
+_shared = {}
+
+
+def _preprocess(dataset):
+    """Scale a dataset, and find the distance from each point to its
+    `min_samples`-th nearest neighbour and the linkage matrix for each
+    linkage method, once for every configuration."""
+
+    scaled, _, _ = projection.prepare(dataset)
+    distances, _ = (
+        neighbors.NearestNeighbors(n_neighbors=min_samples)
+        .fit(scaled)
+        .kneighbors(scaled)
+    )
+    linkage_matrices = {
+        linkage: fitting.linkage_matrix(scaled, linkage)["linkage_matrix"]
+        for linkage in linkages
+    }
+
+    return {
+        "scaled": scaled,
+        "core_distances": distances[:, -1],
+        "linkage_matrices": linkage_matrices,
+    }
+
+
+def _initialise(shared):
+    """Give a worker process the preprocessed datasets."""
+
+    _shared.update(shared)
+
+
+def _get_jobs(names):
+    """Build every configuration in the grids for each dataset."""
+
+    for name in names:
+        for k, seed in itertools.product(n_clusters, seeds):
+            yield name, "kmeans", {"n_clusters": k, "seed": seed}
+        for value in eps:
+            config = {"eps": float(value), "min_samples": min_samples}
+            yield name, "dbscan", config
+        for k, linkage in itertools.product(n_clusters, linkages):
+            yield name, "agglomerative", {"n_clusters": k, "linkage": linkage}
+
+
+def _has_tiny_cluster(labels):
+    """Determine whether a clustering has a cluster with fewer than
+    `min_size` of the points in it."""
+
+    _, sizes = np.unique(labels, return_counts=True)
+    return sizes.min() < min_size * len(labels)
+
+
+def _is_clearly_bad(data, algorithm, config):
+    """Decide, before the full fit, whether a configuration is clearly bad.
+
+    For DBSCAN, too few points could be core points for it to find anything
+    but noise. For agglomerative clustering, cutting the shared linkage
+    matrix into `n_clusters` leaves a tiny cluster. For k-means, so does a
+    partial fit of `partial_iter` iterations from a single initialisation.
+    """
+
+    if algorithm == "dbscan":
+        core = np.mean(data["core_distances"] <= config["eps"])
+        return core < min_core
+
+    if algorithm == "agglomerative":
+        linkage_matrix = data["linkage_matrices"][config["linkage"]]
+        labels = hierarchy.fcluster(
+            linkage_matrix, config["n_clusters"], "maxclust"
+        )
+        return _has_tiny_cluster(labels)
+
+    partial = cluster.KMeans(
+        config["n_clusters"],
+        n_init=1,
+        max_iter=partial_iter,
+        random_state=config["seed"],
+    ).fit(data["scaled"])
+
+    return _has_tiny_cluster(partial.labels_)
+
+
+def _run_job(job):
+    """Fit and score a single configuration, cutting it off early if it is
+    clearly bad, or after fitting if the noise makes up most of it."""
+
+    name, algorithm, config = job
+    data = _shared[name]
+    row = {"dataset": name, "algorithm": algorithm, **config}
+
+    if _is_clearly_bad(data, algorithm, config):
+        return {**row, "pruned": True}
+
+    fit = getattr(fitting, algorithm)
+    labels = fit(data["scaled"], **config)["labels"]
+    noise = np.mean(labels == -1)
+    found = len(set(labels) - {-1})
+    if noise > max_noise or found < 2:
+        return {**row, "noise": noise, "n_found": found, "pruned": True}
+
+    score = metrics.adjusted_rand_score(data["true_labels"], labels)
+    return {
+        **row,
+        "noise": noise,
+        "n_found": found,
+        "score": score,
+        "pruned": False,
+    }
+
+
+def run_sweep(datasets, max_workers=None):
+    """Sweep over the grids for some datasets, given as a dictionary of the
+    data and true labels of each, and collect the results in a table."""
+
+    shared = {}
+    for name, (dataset, true_labels) in datasets.items():
+        shared[name] = {**_preprocess(dataset), "true_labels": true_labels}
+
+    jobs = list(_get_jobs(datasets))
+    with futures.ProcessPoolExecutor(
+        max_workers, initializer=_initialise, initargs=(shared,)
+    ) as executor:
+        rows = list(executor.map(_run_job, jobs, chunksize=8))
+
+    columns = ["dataset", "algorithm", "n_clusters", "seed", "eps"]
+    columns += ["min_samples", "linkage", "noise", "n_found", "score"]
+    columns += ["pruned"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def get_best_settings(results):
+    """Find the best configuration of each algorithm for each dataset, as
+    keyword arguments for `make_plot`."""
+
+    scored = results.dropna(subset=["score"])
+    best = scored.groupby(["algorithm", "dataset"])["score"].idxmax()
+
+    settings = {}
+    for _, row in scored.loc[best].iterrows():
+        config = {
+            param: types[param](row[param])
+            for param in params[row["algorithm"]]
+        }
+        settings.setdefault(row["algorithm"], {})[row["dataset"]] = config
+
+    return settings
+
+
+def main(names=("moons", "ellipses", "spheres")):
+    """Run the sweep, write the results to file and make the plots with the
+    best configurations."""
+
+    here = pathlib.Path(__file__).parent
+    data = here / "data"
+    datasets = {}
+    for name in names:
+        dataset = projection.load_dataset(data / name)
+        labels = np.genfromtxt(
+            data / name / "labels.csv", delimiter=","
+        ).astype(int)
+
+        datasets[name] = (dataset, labels)
+
+    results = run_sweep(datasets)
+    results.to_csv(here / "sweep.csv", index=False)
+
+    for algorithm, settings in get_best_settings(results).items():
+        for figure in figures[algorithm]:
+            figure.main(names, settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+""" A pure-Python, LaTeX-aware spellchecker to use in place of `aspell`. """
+
+import bisect
+import functools
+import pathlib
+import re
+import subprocess
+
+import known
+
+# Generated from aspell's own en_GB dictionary by `inv wordlist`, so that both
+# checkers know the same words.
+DICTIONARY = str(pathlib.Path(__file__).parent / "en_GB.words")
+
+# The arguments of each command as in `aspell`'s TeX filter: `p` is a
+# parameter and `o` an optional one. Lowercase arguments are skipped and
+# uppercase ones are checked; the arguments of other commands are checked.
+COMMANDS = {
+    "addcontentsline": "ppP",
+    "addtocontents": "pP",
+    "addtocounter": "pp",
+    "addtolength": "pp",
+    "addvspace": "p",
+    "begin": "po",
+    "bibitem": "op",
+    "bibliography": "p",
+    "bibliographystyle": "p",
+    "cite": "op",
+    "citeauthor": "op",
+    "citep": "oop",
+    "citet": "oop",
+    "citeyear": "op",
+    "documentclass": "op",
+    "doi": "p",
+    "end": "p",
+    "eqref": "p",
+    "graphicspath": "p",
+    "hspace": "p",
+    "href": "pP",
+    "hyphenation": "p",
+    "include": "p",
+    "includegraphics": "op",
+    "includeonly": "p",
+    "input": "p",
+    "label": "p",
+    "newcommand": "poOP",
+    "newcounter": "po",
+    "newenvironment": "poOPP",
+    "nocite": "p",
+    "pageref": "p",
+    "pagestyle": "p",
+    "ref": "p",
+    "renewcommand": "poOP",
+    "setcounter": "pp",
+    "setlength": "pp",
+    "subref": "p",
+    "url": "p",
+    "usepackage": "op",
+    "vspace": "p",
+}
+
+COMMENT = re.compile(r"(?<!\\)%.*$", re.MULTILINE)
+MATH = re.compile(
+    r"(?<!\\)\$\$.*?(?<!\\)\$\$"
+    r"|(?<!\\)\$.*?(?<!\\)\$"
+    r"|\\\(.*?\\\)"
+    r"|\\\[.*?\\\]"
+    r"|\\begin\{(equation|align|gather|multline|eqnarray|displaymath|math)"
+    r"(\*?)\}.*?\\end\{\1\2\}",
+    re.DOTALL,
+)
+COMMAND = re.compile(r"\\([A-Za-z@]+\*?|.)", re.DOTALL)
+WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+
+class Dictionary:
+    """ A word list held as a single sorted array and searched by bisection.
+
+    Words are matched in the way `aspell` matches them: a lowercase entry
+    also allows the capitalised and uppercase forms of the word.
+    """
+
+    def __init__(self, words, is_sorted=False):
+
+        self.words = list(words) if is_sorted else sorted(set(words))
+
+    @classmethod
+    def from_file(cls, path):
+        """ Read a word list as written by `inv wordlist`: one word per line,
+        already sorted and deduplicated, so that loading it is only a split.
+        """
+
+        with open(path, encoding="utf-8") as wordlist:
+            return cls(wordlist.read().split(), is_sorted=True)
+
+    def __contains__(self, word):
+
+        index = bisect.bisect_left(self.words, word)
+        return index < len(self.words) and self.words[index] == word
+
+    def __len__(self):
+
+        return len(self.words)
+
+    def check(self, word):
+        """ Determine whether a word is spelt correctly. """
+
+        if word in self:
+            return True
+
+        if word[:1].isupper() and (word[1:].islower() or word.isupper()):
+            if word.lower() in self:
+                return True
+
+        return word.isupper() and word.capitalize() in self
+
+
+def dump_aspell_dictionary(path=DICTIONARY, lang="en_GB"):
+    """ Write out every word in an `aspell` dictionary, with its affixes
+    expanded, as a sorted list with one word per line. This only needs doing
+    once, on a machine with `aspell`. """
+
+    master = subprocess.run(
+        ["aspell", "-d", lang, "--encoding=utf-8", "dump", "master"],
+        capture_output=True,
+        check=True,
+    )
+    expanded = subprocess.run(
+        ["aspell", "-d", lang, "--encoding=utf-8", "expand"],
+        input=master.stdout,
+        capture_output=True,
+        check=True,
+    )
+
+    words = (
+        word.split("/")[0]
+        for word in expanded.stdout.decode("utf-8").split()
+    )
+    words = sorted({word for word in words if not word.isdigit()})
+    with open(path, "w", encoding="utf-8") as wordlist:
+        wordlist.write("\n".join(words) + "\n")
+
+
+@functools.lru_cache(maxsize=None)
+def load_dictionary(path=DICTIONARY):
+    """ Load a dictionary, once per process. """
+
+    if not pathlib.Path(path).exists():
+        raise FileNotFoundError(
+            f"There is no word list at {path}; create one with `inv wordlist`."
+        )
+
+    return Dictionary.from_file(path)
+
+
+@functools.lru_cache(maxsize=None)
+def _known_pattern():
+    """ Merge the known words and patterns into a single expression. """
+
+    return re.compile("|".join(f"(?:{word})" for word in sorted(known.words)))
+
+
+def _group_end(text, start, opening, closing):
+    """ Find the end of the balanced group that opens at `start`. """
+
+    depth = 0
+    index = start
+    while index < len(text):
+        char = text[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return index + 1
+
+        index += 1
+
+    return len(text)
+
+
+def _strip_commands(text):
+    """ Remove the commands, and any skipped arguments, from some LaTeX. """
+
+    pieces = []
+    position = 0
+    for match in COMMAND.finditer(text):
+        if match.start() < position:
+            continue
+
+        pieces.append(text[position : match.start()])
+        position = match.end()
+        for kind in COMMANDS.get(match.group(1).rstrip("*"), ""):
+            opening, closing = ("[", "]") if kind in "oO" else ("{", "}")
+            start = len(text[position:]) - len(text[position:].lstrip())
+            start += position
+            if not text.startswith(opening, start):
+                if kind in "oO":
+                    continue
+                break
+
+            end = _group_end(text, start, opening, closing)
+            if kind.isupper():
+                pieces.append(_strip_commands(text[start + 1 : end - 1]))
+
+            position = end
+
+        pieces.append(" ")
+
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+def tokenize(latex):
+    """ Get the words in some LaTeX, skipping comments, maths, commands and
+    the keys in citations, references and the like. """
+
+    text = MATH.sub(" ", COMMENT.sub("", latex)).replace("’", "'")
+    for word in WORD.findall(_strip_commands(text)):
+        if len(word) > 1:
+            yield word
+
+
+def aspell_unknown_words(latex, lang="en_GB"):
+    """ Find the unknown words in some LaTeX with `aspell` itself. """
+
+    aspell_output = subprocess.check_output(
+        ["aspell", "-t", "--list", f"--lang={lang}"], input=latex, text=True
+    )
+
+    errors = set(aspell_output.split("\n")) - {""}
+    unknowns = set()
+    for error in errors:
+        if not any(
+            re.fullmatch(word.lower(), error.lower()) for word in known.words
+        ):
+            unknowns.add(error)
+
+    return unknowns
+
+
+def unknown_words(latex, dictionary=DICTIONARY):
+    """ Find the words in some LaTeX that are neither in the dictionary (a
+    `Dictionary` or the path to a word list) nor known to be correct. """
+
+    if not isinstance(dictionary, Dictionary):
+        dictionary = load_dictionary(str(dictionary))
+
+    known_words = _known_pattern()
+    return {
+        word
+        for word in set(tokenize(latex))
+        if not dictionary.check(word)
+        and not known_words.fullmatch(word.lower())
+    }
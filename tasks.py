@@ -2,7 +2,7 @@
 
 import pathlib
 import re
-import subprocess
+import shutil
 import sys
 from collections import Counter
 from difflib import SequenceMatcher
@@ -15,7 +15,9 @@ from bibtexparser.bparser import BibTexParser
 from bibtexparser.bwriter import BibTexWriter
 from invoke import task
 
-import known
+import enrichment
+import spelling
+import watcher
 
 
 @task
@@ -25,40 +27,53 @@ def compile(c, engine="xelatex"):
     c.run(f"latexmk -interaction=nonstopmode -shell-escape --{engine} main.tex")
 
 
+def check_spelling(path, checker="aspell", dictionary=spelling.DICTIONARY):
+    """ Check the spelling of a file, and report any unknown words. Use
+    `checker="python"` to check without `aspell`, against the word list at
+    `dictionary`. """
+
+    print(f"📖 Checking {path}")
+    latex = pathlib.Path(path).read_text()
+    if checker == "python":
+        unknowns = spelling.unknown_words(latex, dictionary)
+    else:
+        unknowns = spelling.aspell_unknown_words(latex)
+
+    if unknowns:
+        print(f"❗️ In {path} the following words are not known:")
+        for string in sorted(unknowns):
+            print(string)
+
+        return False
+
+    print("All good! ✅")
+    return True
+
+
 @task
-def spellcheck(c):
-    """ Check spelling. """
+def spellcheck(c, checker="aspell", dictionary=spelling.DICTIONARY):
+    """ Check spelling, with `aspell` or the in-process "python" checker. """
+
+    if checker == "python" and not pathlib.Path(dictionary).exists():
+        print(f"❗️ There is no word list at {dictionary}.")
+        print("Create one with `inv wordlist` on a machine with aspell.")
+        sys.exit(1)
 
     article = pathlib.Path("./sec/").glob("*.tex")
     exit_codes = [0]
     for path in article:
+        passed = check_spelling(path, checker, dictionary)
+        exit_codes.append(0 if passed else 1)
 
-        print(f"📖 Checking {path}")
-        latex = path.read_text()
-        aspell_output = subprocess.check_output(
-            ["aspell", "-t", "--list", "--lang=en_GB"], input=latex, text=True
-        )
+    sys.exit(max(exit_codes))
 
-        errors = set(aspell_output.split("\n")) - {""}
-        unknowns = set()
-        for error in errors:
-            if not any(
-                re.fullmatch(word.lower(), error.lower())
-                for word in known.words
-            ):
-                unknowns.add(error)
-
-        if unknowns:
-            print(f"❗️ In {path} the following words are not known:")
-            for string in sorted(unknowns):
-                print(string)
-
-            exit_codes.append(1)
-        else:
-            print("All good! ✅")
-            exit_codes.append(0)
 
-    sys.exit(max(exit_codes))
+@task
+def wordlist(c, path=spelling.DICTIONARY, lang="en_GB"):
+    """ Write out aspell's dictionary for the in-process spellchecker. """
+
+    spelling.dump_aspell_dictionary(path, lang)
+    print(f"Wrote {len(spelling.Dictionary.from_file(path))} words. ✅")
 
 
 def extract_bibentries(bibfile):
@@ -102,41 +117,135 @@ def get_citations_to_export(bibentries):
     return citations_to_export
 
 
-def export_citations(citations, destination):
-    """ Create the BibTeX database to export. """
+def enrich_citations(citations, cache=".cache/crossref", concurrency=8):
+    """ Fill in any missing DOIs, abstracts and years from Crossref. """
+
+    print("Enriching entries...")
+    citations = citations.copy()
+    updates = enrichment.enrich_entries(
+        citations.to_dict("records"), cache=cache, concurrency=concurrency
+    )
+    for field in enrichment.FIELDS:
+        values = [update.get(field, np.nan) for update in updates]
+        new = pd.Series(values, index=citations.index, dtype=object)
+        if field in citations:
+            citations[field] = citations[field].fillna(new)
+        else:
+            citations[field] = new
+
+    filled = sum(len(update) for update in updates)
+    print(f"Filled {filled} field(s).")
+    return citations
+
+
+ENTRY_START = re.compile(r"^@\s*(\w+)\s*\{\s*([^,\s]+)\s*,", re.MULTILINE)
+
+
+def _normalise_entry(entry):
+    """ Reduce an entry to the fields that get written, with any whitespace in
+    their values collapsed. """
+
+    return {
+        attribute: " ".join(str(value).split())
+        for attribute, value in entry.items()
+        if pd.notna(value) and attribute != "month"
+    }
+
+
+def _split_entries(bibtex):
+    """ Split the text of a BibTeX file into the raw text of each entry. """
+
+    starts = list(ENTRY_START.finditer(bibtex))
+    ends = [match.start() for match in starts[1:]] + [len(bibtex)]
+
+    chunks = {}
+    for match, end in zip(starts, ends):
+        key = match.group(2)
+        chunk = bibtex[match.start() : end].rstrip() + "\n\n"
+        chunks[key] = None if key in chunks else chunk
+
+    return chunks
+
+
+def _render_entry(entry, writer):
+    """ Write a single entry as BibTeX. """
 
     db = BibDatabase()
-    citation_dicts = (dict(row) for _, row in citations.iterrows())
-    citation_dicts = [
+    db.entries = [entry]
+    return writer.write(db)
+
+
+def export_citations(citations, destination, current=None, backup=False):
+    """ Write the BibTeX database to file, rewriting only those entries whose
+    content has changed and leaving the file untouched if none have. """
+
+    destination = pathlib.Path(destination)
+    entries = [
         {
             attribute: value
             for attribute, value in citation.items()
-            if value is not np.nan and attribute != "month"
+            if pd.notna(value) and attribute != "month"
         }
-        for citation in citation_dicts
+        for citation in citations.to_dict("records")
     ]
+    entries.sort(key=lambda entry: entry["ID"].lower())
+
+    existing = destination.read_text() if destination.exists() else ""
+    if current is None and existing:
+        current = extract_bibentries(destination)
+
+    previous = {}
+    if current is not None:
+        for entry in current.to_dict("records"):
+            key = entry["ID"]
+            duplicate = key in previous
+            previous[key] = None if duplicate else _normalise_entry(entry)
+
+    chunks = _split_entries(existing)
+    writer = BibTexWriter()
+    writer.indent = "    "
+
+    bibtex = []
+    rewritten = 0
+    for entry in entries:
+        key = entry["ID"]
+        chunk = chunks.get(key)
+        if chunk is None or previous.get(key) != _normalise_entry(entry):
+            chunk = _render_entry(entry, writer)
+            rewritten += 1
+
+        bibtex.append(chunk)
+
+    bibtex = "".join(bibtex)
+    if bibtex == existing:
+        print("Nothing has changed. ✅")
+        return False
+
+    if backup and existing:
+        print("Backing up current bibliography.")
+        backup_path = destination.with_name(f"_{destination.name}")
+        shutil.copyfile(destination, backup_path)
 
-    db.entries = citation_dicts
-
-    with open(destination, "w") as bibtexfile:
-        writer = BibTexWriter()
-        writer.indent = "    "
-        bibtexparser.dump(db, bibtexfile, writer)
-
-    print("Done! ✅")
+    destination.write_text(bibtex)
+    print(f"Rewrote {rewritten} of {len(entries)} entries. ✅")
+    return True
 
 
 @task
-def bibliography(c, path="bibliography.bib", backup=True):
-    """ Clean and compile the bibliography. """
-
-    if backup and pathlib.Path(path).exists():
-        print("Backing up current bibliography.")
-        c.run(f"cp {path} _{path}")
+def bibliography(
+    c, path="bibliography.bib", backup=True, enrich=False, concurrency=8
+):
+    """ Clean and compile the bibliography, optionally filling in any missing
+    metadata. """
 
     bibentries = extract_bibentries(path)
     citations_to_export = get_citations_to_export(bibentries)
-    export_citations(citations_to_export, path)
+    if enrich:
+        citations_to_export = enrich_citations(
+            citations_to_export, concurrency=concurrency
+        )
+
+    export_citations(citations_to_export, path, bibentries, backup)
 
 
 @task
@@ -162,3 +271,35 @@ def bibcheck(c, root="sec", path="bibliography.bib"):
         keystring = key + " " * (longest - len(key))
         titlestring = title[:40] + "..." if len(title) > 40 else title
         print(" | ".join((keystring, titlestring)))
+
+
+@task
+def watch(
+    c,
+    engine="xelatex",
+    checker="aspell",
+    dictionary=spelling.DICTIONARY,
+    debounce=0.5,
+):
+    """ Watch the sources and rebuild only the stage each change affects. """
+
+    modules = watcher.ModuleCache(".")
+
+    def run(actions):
+        for stage, target in actions:
+            print(f"🔁 Running {stage}", *([target] if target else []))
+            try:
+                if stage == "spellcheck":
+                    check_spelling(target, checker, dictionary)
+                elif stage == "bibcheck":
+                    bibcheck(c, path=str(target))
+                elif stage == "compile":
+                    compile(c, engine=engine)
+                elif stage == "dataset":
+                    modules.dataset(target)
+                elif stage == "figure":
+                    modules.figure(*target)
+            except Exception as error:
+                print(f"❗️ {stage} failed: {error}")
+
+    watcher.watch(".", run, debounce=float(debounce))
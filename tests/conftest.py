@@ -0,0 +1,9 @@
+""" Shared set-up for the tests. """
+
+import pathlib
+import sys
+
+# The figure scripts import each other as top-level modules, as they do when
+# run from their own directory.
+CLUSTERS = pathlib.Path(__file__).parents[1] / "img" / "clusters"
+sys.path.insert(0, str(CLUSTERS))
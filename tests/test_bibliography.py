@@ -0,0 +1,124 @@
+""" Tests for the incremental writer of the bibliography. """
+
+import pytest
+
+pytest.importorskip("bibtexparser")
+pytest.importorskip("invoke")
+
+import tasks  # noqa: E402
+
+# Written by hand, with a different layout from `BibTexWriter`'s, so that an
+# entry kept as it was can be told apart from one that has been rewritten.
+BIBTEX = """\
+@article{Aberdour2007,
+  author = {M. {Aberdour}},
+  journal = {IEEE Software},
+  title = {Achieving Quality in Open-Source Software},
+  year = {2007}
+}
+
+@inproceedings{Ackerman2009,
+  author = {Margareta Ackerman and Shai Ben-David},
+  title = {Clusterability: A Theoretical Study},
+  year = {2009}
+}
+
+@book{Wolsey1998,
+  author = {Laurence A. Wolsey},
+  publisher = {Wiley},
+  title = {Integer Programming},
+  year = {1998}
+}
+
+"""
+
+
+@pytest.fixture
+def path(tmp_path):
+
+    path = tmp_path / "bibliography.bib"
+    path.write_text(BIBTEX)
+    return path
+
+
+def _chunks(path):
+
+    return tasks._split_entries(path.read_text())
+
+
+def _export(citations, path):
+
+    return tasks.export_citations(citations, path)
+
+
+def test_nothing_is_written_when_nothing_has_changed(path):
+
+    mtime = path.stat().st_mtime_ns
+
+    assert not _export(tasks.extract_bibentries(path), path)
+    assert path.read_text() == BIBTEX
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_only_the_changed_entry_is_rewritten(path):
+
+    before = _chunks(path)
+    citations = tasks.extract_bibentries(path)
+    changed = citations["ID"] == "Ackerman2009"
+    citations.loc[changed, "title"] = "Clusterability: A Theoretical Survey"
+
+    assert _export(citations, path)
+
+    after = _chunks(path)
+    assert after["Aberdour2007"] == before["Aberdour2007"]
+    assert after["Wolsey1998"] == before["Wolsey1998"]
+    assert after["Ackerman2009"] != before["Ackerman2009"]
+    assert "A Theoretical Survey" in after["Ackerman2009"]
+
+    rewritten = path.read_text()
+    assert not _export(tasks.extract_bibentries(path), path)
+    assert path.read_text() == rewritten
+
+
+def test_added_and_removed_entries(path):
+
+    before = _chunks(path)
+    citations = tasks.extract_bibentries(path)
+    citations = citations[citations["ID"] != "Wolsey1998"]
+    added = {
+        "ENTRYTYPE": "article",
+        "ID": "Abbott2010",
+        "author": "Tom Abbott",
+        "title": "A New Entry",
+        "year": "2010",
+    }
+    citations = citations.append(added, ignore_index=True)
+
+    assert _export(citations, path)
+
+    after = _chunks(path)
+    assert list(after) == ["Abbott2010", "Aberdour2007", "Ackerman2009"]
+    assert after["Aberdour2007"] == before["Aberdour2007"]
+    assert after["Ackerman2009"] == before["Ackerman2009"]
+
+    rewritten = path.read_text()
+    assert not _export(tasks.extract_bibentries(path), path)
+    assert path.read_text() == rewritten
+
+
+def test_duplicate_keys_are_written_once(path):
+
+    duplicate = BIBTEX.split("\n\n")[0] + "\n\n"
+    path.write_text(BIBTEX + duplicate.replace("2007}", "2008}"))
+    before = _chunks(path)
+    citations = tasks.extract_bibentries(path)
+    citations = citations.drop_duplicates(subset=["ID"], keep="last")
+
+    assert _export(citations, path)
+
+    text = path.read_text()
+    assert text.count("{Aberdour2007,") == 1
+    assert "year = {2008}" in text
+    assert _chunks(path)["Wolsey1998"] == before["Wolsey1998"]
+    assert not _export(tasks.extract_bibentries(path), path)
+    assert path.read_text() == text
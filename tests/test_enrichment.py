@@ -0,0 +1,160 @@
+""" Tests for the enrichment stage, against a stub server on localhost. """
+
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+import enrichment
+
+pytest.importorskip("aiohttp")
+
+RECORD = {
+    "title": ["Clusterability: A Theoretical Study"],
+    "DOI": "10.1000/clusterability",
+    "abstract": "<jats:p>A study of clusterability.</jats:p>",
+    "issued": {"date-parts": [[2009]]},
+}
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    """ A stand-in for the Crossref API that counts its requests. """
+
+    def __init__(self):
+
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.active = 0
+        self.most_active = 0
+        self.throttled = set()
+        self.broken = set()
+        self.delay = 0.05
+
+    @property
+    def url(self):
+
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+
+        pass
+
+    def do_GET(self):
+
+        server = self.server
+        query = urllib.parse.urlparse(self.path).query
+        title = urllib.parse.parse_qs(query).get("query.bibliographic", [""])
+        title = title[0]
+        with server.lock:
+            server.requests.append(title)
+            server.active += 1
+            server.most_active = max(server.most_active, server.active)
+
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+            throttled = title in server.throttled
+            server.throttled.discard(title)
+
+        if throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        if title in server.broken:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        items = [{**RECORD, "title": [title]}] if title else []
+        body = json.dumps({"message": {"items": items}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _enrich(entries, server, cache, concurrency=4):
+
+    return enrichment.enrich_entries(
+        entries,
+        cache=cache,
+        base_url=server.url,
+        concurrency=concurrency,
+        transport=enrichment.AiohttpTransport(pool_size=concurrency),
+    )
+
+
+def test_reruns_are_served_from_the_cache(server, tmp_path):
+
+    entries = [{"ID": f"E{i}", "title": f"Title number {i}"} for i in range(6)]
+
+    first = _enrich(entries, server, tmp_path)
+    assert len(server.requests) == 6
+    assert first[0] == {
+        "doi": "10.1000/clusterability",
+        "abstract": "A study of clusterability.",
+        "year": "2009",
+    }
+
+    second = _enrich(entries, server, tmp_path)
+    assert second == first
+    assert len(server.requests) == 6
+
+
+def test_concurrency_is_limited(server, tmp_path):
+
+    entries = [{"title": f"Title number {i}"} for i in range(20)]
+
+    _enrich(entries, server, tmp_path, concurrency=4)
+    assert 1 < server.most_active <= 4
+
+
+def test_identical_requests_share_a_call(server, tmp_path):
+
+    entries = [{"ID": f"E{i}", "title": "The same title"} for i in range(5)]
+
+    updates = _enrich(entries, server, tmp_path)
+    assert server.requests == ["The same title"]
+    assert all(update == updates[0] for update in updates)
+
+
+def test_throttled_requests_are_retried(server, tmp_path):
+
+    server.throttled.add("A throttled title")
+
+    updates = _enrich([{"title": "A throttled title"}], server, tmp_path)
+    assert server.requests == ["A throttled title"] * 2
+    assert updates[0]["year"] == "2009"
+
+
+def test_a_failure_only_affects_its_entry(server, tmp_path):
+
+    server.broken.add("A broken title")
+    entries = [{"title": "A broken title"}, {"title": "A working title"}]
+
+    updates = _enrich(entries, server, tmp_path)
+    assert updates[0] == {}
+    assert updates[1]["year"] == "2009"
+
+    server.broken.clear()
+    updates = _enrich(entries, server, tmp_path)
+    assert updates[0]["year"] == "2009"
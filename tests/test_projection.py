@@ -0,0 +1,94 @@
+""" Tests for the projection of wide datasets onto the plane. """
+
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("sklearn")
+
+import numpy as np  # noqa: E402
+from matplotlib.collections import PathCollection  # noqa: E402
+from sklearn import datasets, preprocessing  # noqa: E402
+
+import fitting  # noqa: E402
+import projection  # noqa: E402
+import rendering  # noqa: E402
+from dbscan import main as dbscan  # noqa: E402
+from hierarchical import main as hierarchical  # noqa: E402
+from kmeans import main as kmeans  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(fitting, "cache", tmp_path / ".cache")
+    return fitting.cache
+
+
+@pytest.fixture
+def blobs(tmp_path):
+
+    data, labels = datasets.make_blobs(
+        2_000, n_features=80, centers=3, random_state=0
+    )
+    directory = tmp_path / "blobs"
+    directory.mkdir()
+    np.save(directory / "main.npy", data)
+
+    return projection.load_dataset(directory), labels
+
+
+@pytest.mark.parametrize(
+    "figure", (kmeans, hierarchical, dbscan), ids=("kmeans", "hier", "dbscan")
+)
+def test_wide_data_are_plotted_inside_the_axes(figure, blobs, tmp_path):
+
+    dataset, labels = blobs
+    renderer = rendering.Renderer(())
+    figure.make_plot(
+        dataset,
+        labels,
+        str(tmp_path / "blobs"),
+        space="reduced",
+        renderer=renderer,
+    )
+
+    ax = renderer.figures["scatter"].axes[0]
+    (xmin, xmax), (ymin, ymax) = ax.get_xlim(), ax.get_ylim()
+    scatters = [c for c in ax.collections if isinstance(c, PathCollection)]
+    points = np.concatenate([c.get_offsets() for c in scatters])
+
+    assert len(points) >= len(dataset)
+    assert np.all((xmin <= points[:, 0]) & (points[:, 0] <= xmax))
+    assert np.all((ymin <= points[:, 1]) & (points[:, 1] <= ymax))
+
+
+def test_two_dimensional_data_pass_through():
+
+    data = np.random.default_rng(0).normal(size=(300, 2))
+
+    scaled, points, to_plane = projection.prepare(data)
+
+    expected = preprocessing.StandardScaler().fit_transform(data)
+    assert np.allclose(scaled, expected)
+    assert np.array_equal(points, scaled)
+    assert np.array_equal(to_plane(scaled[:5]), scaled[:5])
+    assert projection.get_lims(data, points, kmeans.lims) == kmeans.lims
+
+
+def test_each_dataset_is_prepared_once(blobs, cache, monkeypatch):
+
+    dataset, _ = blobs
+    first = projection.prepare(dataset, "reduced")
+
+    def fail(*args):
+        raise AssertionError("the dataset was prepared again")
+
+    monkeypatch.setattr(projection, "_prepare", fail)
+    second = projection.prepare(dataset, "reduced")
+
+    assert np.array_equal(first[0], second[0])
+    assert np.array_equal(first[1], second[1])
+    assert np.allclose(first[2](first[0][:5]), second[1][:5])
+
+    with pytest.raises(AssertionError):
+        projection.prepare(dataset, "reduced", "random")
@@ -0,0 +1,57 @@
+""" Tests for the reused figures and exports of the cluster plots. """
+
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import numpy as np  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+import rendering  # noqa: E402
+
+
+def _plot(renderer, path, seed):
+
+    points = np.random.default_rng(seed).normal(size=(2, 500))
+    ax = renderer.axes("scatter", xlim=(-3, 3), ylim=(-3, 3))
+    ax.scatter(*points)
+    renderer.save(ax, path)
+
+
+def test_each_plot_is_written_in_every_format(tmp_path):
+
+    with rendering.Renderer(("pdf", "png", "svg"), tmp_path / "all.pdf") as r:
+        for i in range(2):
+            _plot(r, tmp_path / f"plot_{i}", i)
+
+    for i in range(2):
+        for extension in ("pdf", "png", "svg"):
+            assert (tmp_path / f"plot_{i}.{extension}").stat().st_size
+
+    assert (tmp_path / "all.pdf").stat().st_size
+
+
+def test_many_pages_are_drawn_on_one_figure_in_flat_memory(tmp_path):
+
+    renderer = rendering.Renderer((), tmp_path / "pages.pdf")
+    for i in range(5):
+        _plot(renderer, tmp_path / "plot", i)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(5, 25):
+        _plot(renderer, tmp_path / "plot", i)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    figure = renderer.figures["scatter"]
+    assert len(renderer.figures) == 1
+    assert isinstance(figure.canvas, FigureCanvasAgg)
+    assert len(figure.axes[0].collections) == 1
+    assert renderer.pages.get_pagecount() == 25
+    assert after - before < 1_000_000
+
+    renderer.close()
+    assert (tmp_path / "pages.pdf").stat().st_size
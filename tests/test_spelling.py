@@ -0,0 +1,52 @@
+""" Tests for the in-process spellchecker. """
+
+import pathlib
+import shutil
+
+import pytest
+
+import spelling
+
+SECTIONS = sorted(pathlib.Path(__file__).parents[1].glob("sec/*.tex"))
+
+
+def test_commands_maths_and_keys_are_skipped():
+
+    latex = (
+        r"See~\cite[p.~3]{Smyth2019} for \(k\)-means \emph{clusterng} "
+        r"% a commentt" "\n"
+        r"\includegraphics[width=\linewidth]{img/figur.pdf}\label{fig:x}"
+    )
+
+    words = list(spelling.tokenize(latex))
+    assert words == ["See", "for", "means", "clusterng"]
+
+
+def test_capitalisation_follows_aspell():
+
+    dictionary = spelling.Dictionary(["cluster", "NHS", "England"])
+
+    assert dictionary.check("Cluster")
+    assert dictionary.check("CLUSTER")
+    assert dictionary.check("NHS")
+    assert not dictionary.check("Nhs")
+    assert not dictionary.check("england")
+
+
+@pytest.fixture(scope="module")
+def dictionary(tmp_path_factory):
+
+    path = tmp_path_factory.mktemp("dictionary") / "en_GB.words"
+    spelling.dump_aspell_dictionary(path)
+    return spelling.Dictionary.from_file(path)
+
+
+@pytest.mark.skipif(shutil.which("aspell") is None, reason="needs aspell")
+@pytest.mark.parametrize("path", SECTIONS, ids=lambda path: path.name)
+def test_same_unknown_words_as_aspell(path, dictionary):
+
+    latex = path.read_text()
+
+    assert spelling.unknown_words(
+        latex, dictionary
+    ) == spelling.aspell_unknown_words(latex)
@@ -0,0 +1,183 @@
+""" Route file changes to the cheapest stage that brings the outputs up to
+date, keeping the figure scripts imported between runs. """
+
+import importlib.util
+import os
+import pathlib
+import queue
+import sys
+
+FIGURES = ("kmeans", "hierarchical", "dendogram", "dbscan")
+DATASETS = ("moons", "ellipses", "spheres")
+STAGES = ("dataset", "figure", "spellcheck", "bibcheck", "compile")
+CLUSTERS = pathlib.Path("img", "clusters")
+
+
+def route(path, root):
+    """ Get the actions needed after a change to `path`. """
+
+    try:
+        parts = pathlib.Path(path).resolve().relative_to(root).parts
+    except ValueError:
+        return []
+
+    filename = parts[-1]
+    suffix = pathlib.Path(filename).suffix
+    if filename.startswith((".", "_")):
+        return []
+
+    if suffix == ".tex" and len(parts) == 2 and parts[0] == "sec":
+        return [("spellcheck", pathlib.Path(*parts)), ("compile", None)]
+
+    if suffix == ".tex":
+        return [("compile", None)]
+
+    if suffix == ".bib":
+        return [("bibcheck", pathlib.Path(*parts))]
+
+    if pathlib.Path(*parts[:2]) != CLUSTERS:
+        return []
+
+    if len(parts) == 3 and suffix == ".py" and filename != "main.py":
+        return [
+            ("figure", (figure, name))
+            for figure in FIGURES
+            for name in DATASETS
+        ]
+
+    if len(parts) == 4 and parts[2] in FIGURES and filename == "main.py":
+        return [("figure", (parts[2], name)) for name in DATASETS]
+
+    if len(parts) == 5 and parts[2] == "data" and parts[3] in DATASETS:
+        name = parts[3]
+        if filename == "main.py":
+            return [("dataset", name)]
+        if suffix in (".csv", ".npy"):
+            return [("figure", (figure, name)) for figure in FIGURES]
+
+    return []
+
+
+def plan(paths, root):
+    """ Collect the distinct actions for a batch of changes, in stage order.
+    Removed files are ignored. """
+
+    actions = {}
+    for path in sorted(paths):
+        if pathlib.Path(path).exists():
+            actions.update(dict.fromkeys(route(path, root)))
+
+    return sorted(actions, key=lambda action: STAGES.index(action[0]))
+
+
+class ModuleCache:
+    """ The figure and dataset scripts, imported once and only re-executed
+    when their source changes. Their heavy dependencies (`matplotlib`,
+    `scikit-learn`, ...) stay loaded between runs. """
+
+    def __init__(self, root):
+
+        self.clusters = (pathlib.Path(root) / CLUSTERS).resolve()
+        self.modules = {}
+        self.shared = {}
+
+        os.environ.setdefault("MPLBACKEND", "Agg")
+        if str(self.clusters) not in sys.path:
+            sys.path.insert(0, str(self.clusters))
+
+    def _refresh_shared(self):
+        """ Reload any changed modules shared between the figure scripts (such
+        as `fitting`), forgetting the scripts that imported the old ones. """
+
+        for module in list(sys.modules.values()):
+            path = getattr(module, "__file__", None)
+            if path is None or pathlib.Path(path).parent != self.clusters:
+                continue
+
+            mtime = pathlib.Path(path).stat().st_mtime_ns
+            if self.shared.setdefault(module.__name__, mtime) != mtime:
+                importlib.reload(module)
+                self.shared[module.__name__] = mtime
+                self.modules.clear()
+
+    def load(self, path):
+        """ Import a script, or reuse it if it has not changed. """
+
+        self._refresh_shared()
+        path = pathlib.Path(path).resolve()
+        mtime = path.stat().st_mtime_ns
+        cached = self.modules.get(path)
+        if cached is None or cached[0] != mtime:
+            parts = path.relative_to(self.clusters).with_suffix("").parts
+            name = "_".join(parts)
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.modules[path] = (mtime, module)
+
+        return self.modules[path][1]
+
+    def dataset(self, name):
+        """ Regenerate a dataset. """
+
+        self.load(self.clusters / "data" / name / "main.py").main()
+
+    def figure(self, figure, name):
+        """ Redraw one figure for one dataset. """
+
+        self.load(self.clusters / figure / "main.py").main((name,))
+
+
+def _wait_for_batch(changes, debounce):
+    """ Block until a change arrives, then gather any more that follow it
+    within `debounce` seconds of one another. """
+
+    while True:
+        try:
+            paths = {changes.get(timeout=1)}
+            break
+        except queue.Empty:
+            continue
+
+    while True:
+        try:
+            paths.add(changes.get(timeout=debounce))
+        except queue.Empty:
+            return paths
+
+
+def watch(root, run, debounce=0.5):
+    """ Watch `root` and pass the actions for each debounced batch of changes
+    to `run`, until interrupted. """
+
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    root = pathlib.Path(root).resolve()
+    changes = queue.Queue()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+
+            if event.is_directory:
+                return
+            if event.event_type in ("created", "modified"):
+                changes.put(event.src_path)
+            elif event.event_type == "moved":
+                changes.put(event.dest_path)
+
+    observer = Observer()
+    observer.schedule(Handler(), str(root), recursive=True)
+    observer.start()
+    print(f"👀 Watching {root}")
+
+    try:
+        while True:
+            actions = plan(_wait_for_batch(changes, debounce), root)
+            if actions:
+                run(actions)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()